@@ -1,18 +1,19 @@
 from flask import Flask, request, Response
 import os
 import sys
+import json
 import logging
 from sesamutils import VariablesConfig, sesam_logger
 
 from graph import Graph
-from utils import stream_json, determine_url_parts
+from utils import stream_json, determine_url_parts, parse_projection, projection_query_args, compile_projection
 
 app = Flask(__name__)
 
 # Environment variables
 required_env_vars_client_credentials = ["client_id", "client_secret", "grant_type", "resource", "entities_path", "next_page", "token_url"]
 required_env_vars_password = ["client_id", "client_secret", "username", "password", "grant_type", "resource", "scope", "entities_path", "next_page", "token_url"]
-optional_env_vars = ["log_level", "base_url", "sleep", "sharepoint_url"]
+optional_env_vars = ["log_level", "base_url", "sleep", "sharepoint_url", "projections"]
 
 logger = sesam_logger("o365graph")
 
@@ -26,6 +27,19 @@ else:
 if not config.validate():
     sys.exit(1)
 
+try:
+    projections = json.loads(getattr(config, "projections", None) or "{}")
+except ValueError as e:
+    logger.error(f"Invalid json in environment variable 'projections'. Error: {e}")
+    sys.exit(1)
+
+if not isinstance(projections, dict) or not all(
+        isinstance(projection, str) or (isinstance(projection, list) and all(isinstance(f, str) for f in projection))
+        for projection in projections.values()):
+    logger.error("Environment variable 'projections' must be a json object mapping paths to a comma separated string "
+                 "or a list of fields")
+    sys.exit(1)
+
 
 data_access_layer = Graph(config)
 
@@ -38,7 +52,19 @@ def get(path):
     if request.method == "GET":
         path = path
 
-    entities = data_access_layer.get_paged_entities(path, args=request.args)
+    args = request.args
+    if "projection" in args:
+        args = args.copy()
+        projection = args.pop("projection")
+    else:
+        projection = projections.get(path.strip("/")) if isinstance(path, str) else None
+    fields = parse_projection(projection)
+    if fields:
+        args = projection_query_args(fields, args)
+
+    entities = data_access_layer.get_paged_entities(path, args=args)
+    if fields:
+        entities = map(compile_projection(fields), entities)
 
     return Response(
         stream_json(entities),
@@ -0,0 +1,86 @@
+import os
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("sesamutils")
+
+os.environ.update({
+    "client_id": "client",
+    "client_secret": "secret",
+    "grant_type": "client_credentials",
+    "resource": "https://graph.microsoft.com",
+    "entities_path": "value",
+    "next_page": "@odata.nextLink",
+    "token_url": "https://login.microsoftonline.com/token",
+    "projections": '{"users": "id,displayName"}'
+})
+
+import o365graph  # noqa: E402
+
+
+class StubGraph:
+
+    def __init__(self, entities):
+        self.entities = entities
+        self.calls = []
+
+    def get_paged_entities(self, path, args):
+        self.calls.append((path, args))
+        return iter(self.entities)
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    stub = StubGraph([{"@odata.type": "#microsoft.graph.user", "id": "1", "displayName": "A", "mail": "a@b.c"}])
+    monkeypatch.setattr(o365graph, "data_access_layer", stub)
+    return stub
+
+
+@pytest.fixture
+def client():
+    return o365graph.app.test_client()
+
+
+def test_entities_without_projection_passes_args_unchanged(graph, client):
+    resp = client.get("/entities/groups?$filter=a&$expand=owners&$expand=members")
+    path, args = graph.calls[0]
+    assert path == "groups"
+    assert args.getlist("$expand") == ["owners", "members"]
+    assert args.to_dict() == {"$filter": "a", "$expand": "owners"}
+    assert resp.get_json() == [{"@odata.type": "#microsoft.graph.user", "id": "1", "displayName": "A", "mail": "a@b.c"}]
+
+
+def test_entities_projection_arg(graph, client):
+    resp = client.get("/entities/groups?projection=id,mail&$top=5")
+    path, args = graph.calls[0]
+    assert "projection" not in args
+    assert args["$select"] == "id,mail"
+    assert args["$top"] == "5"
+    assert resp.get_json() == [{"id": "1", "mail": "a@b.c"}]
+
+
+def test_entities_projection_keeps_repeated_args(graph, client):
+    client.get("/entities/groups?projection=id,owners.id,members.id&$expand=owners&$expand=members")
+    path, args = graph.calls[0]
+    assert args.getlist("$expand") == ["owners($select=id),members($select=id)"]
+
+
+def test_entities_projection_from_config(graph, client):
+    resp = client.get("/entities/users")
+    path, args = graph.calls[0]
+    assert args["$select"] == "id,displayName"
+    assert resp.get_json() == [{"id": "1", "displayName": "A"}]
+
+
+def test_entities_empty_projection_arg_overrides_config(graph, client):
+    resp = client.get("/entities/users?projection=")
+    path, args = graph.calls[0]
+    assert "projection" not in args and "$select" not in args
+    assert resp.get_json()[0]["mail"] == "a@b.c"
+
+
+def test_entities_post_path_uses_config_projection(graph, client):
+    resp = client.post("/entities/ignored", json="users")
+    path, args = graph.calls[0]
+    assert path == "users"
+    assert resp.get_json() == [{"id": "1", "displayName": "A"}]
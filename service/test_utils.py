@@ -0,0 +1,142 @@
+from utils import _split_expand, parse_projection, projection_query_args, compile_projection
+
+
+def test_split_expand():
+    assert _split_expand("") == []
+    assert _split_expand("manager") == ["manager"]
+    assert _split_expand("manager, memberOf") == ["manager", "memberOf"]
+    assert _split_expand("manager($select=id,displayName),listItem($expand=fields($select=a,b))") == [
+        "manager($select=id,displayName)", "listItem($expand=fields($select=a,b))"]
+
+
+def test_parse_projection():
+    assert parse_projection(None) == []
+    assert parse_projection(" id, displayName,,.") == ["id", "displayName"]
+    assert parse_projection(["id", "manager.id"]) == ["id", "manager.id"]
+
+
+def test_projection_query_args_select():
+    args = projection_query_args(["id", "displayName", "assignedLicenses.skuId"], {"$top": "5"})
+    assert args == {"$top": "5", "$select": "id,displayName,assignedLicenses"}
+
+
+def test_projection_query_args_keeps_callers_select():
+    args = projection_query_args(["id", "displayName"], {"$select": "id"})
+    assert args == {"$select": "id"}
+
+
+def test_projection_query_args_nested_select_on_expand():
+    args = projection_query_args(["id", "manager.displayName", "manager.id"], {"$expand": "manager"})
+    assert args == {"$expand": "manager($select=displayName,id)", "$select": "id"}
+
+
+def test_projection_query_args_keeps_nested_expand_options():
+    args = projection_query_args(["id", "memberOf.id"], {"$expand": "memberOf($select=id,displayName)"})
+    assert args == {"$expand": "memberOf($select=id,displayName)", "$select": "id"}
+
+
+def test_projection_query_args_whole_expanded_property():
+    args = projection_query_args(["manager", "manager.id"], {"$expand": "manager"})
+    assert args == {"$expand": "manager"}
+
+
+def test_projection_query_args_does_not_expand_navigation_property():
+    args = projection_query_args(["id", "manager.displayName"], {})
+    assert args == {"$select": "id"}
+
+
+def test_projection_query_args_second_level_navigation_property():
+    args = projection_query_args(["id", "manager.manager.id", "manager.displayName"], {"$expand": "manager"})
+    assert args == {"$expand": "manager", "$select": "id"}
+
+
+def test_projection_query_args_complex_property_below_expand():
+    args = projection_query_args(["manager.employeeOrgData.division"], {"$expand": "manager"})
+    assert args == {"$expand": "manager($select=employeeOrgData)"}
+
+
+def test_projection_query_args_skips_annotations():
+    args = projection_query_args(["id", "@odata.type", "members.@odata.type"], {"$expand": "members"})
+    assert args == {"$expand": "members", "$select": "id"}
+
+
+def test_projection_query_args_property_annotation():
+    args = projection_query_args(["displayName@odata.type"], {})
+    assert args == {"$select": "displayName"}
+
+
+def test_projection_query_args_drops_unused_expand():
+    args = projection_query_args(["id"], {"$expand": "manager"})
+    assert args == {"$select": "id"}
+
+
+def test_projection_query_args_repeated_expand():
+    class MultiDict(dict):
+        def copy(self):
+            return MultiDict(self)
+
+        def getlist(self, key):
+            return ["manager", "memberOf"] if key == "$expand" else []
+
+    args = projection_query_args(["id", "manager.id", "memberOf.id"], MultiDict({"$expand": "manager"}))
+    assert args == {"$expand": "manager($select=id),memberOf($select=id)", "$select": "id"}
+
+
+def test_projection_query_args_does_not_modify_args():
+    args = {"$top": "5"}
+    projection_query_args(["id"], args)
+    assert args == {"$top": "5"}
+
+
+def test_compile_projection_flattens_and_strips_annotations():
+    project = compile_projection(["id", "manager.displayName", "manager"])
+    entity = {
+        "@odata.type": "#microsoft.graph.user",
+        "id": "1",
+        "mail": "a@example.com",
+        "manager": {"@odata.type": "#microsoft.graph.user", "id": "2", "displayName": "B"}
+    }
+    assert project(entity) == {"id": "1", "manager.displayName": "B", "manager": {"id": "2", "displayName": "B"}}
+
+
+def test_compile_projection_lists_along_path():
+    project = compile_projection(["assignedLicenses.skuId", "businessPhones"])
+    entity = {"assignedLicenses": [{"skuId": "a"}, {"skuId": "b", "disabledPlans": []}], "businessPhones": ["1"]}
+    assert project(entity) == {"assignedLicenses.skuId": ["a", "b"], "businessPhones": ["1"]}
+
+
+def test_compile_projection_missing_fields():
+    project = compile_projection(["id", "manager.displayName", "assignedLicenses.skuId"])
+    assert project({"id": "1", "assignedLicenses": "invalid"}) == {
+        "id": "1", "manager.displayName": None, "assignedLicenses.skuId": None}
+
+
+def test_compile_projection_annotations():
+    project = compile_projection(["id", "@odata.type", "members.@odata.type"])
+    entity = {
+        "@odata.type": "#microsoft.graph.group",
+        "id": "1",
+        "members": [{"@odata.type": "#microsoft.graph.user"}, {"@odata.type": "#microsoft.graph.device"}]
+    }
+    assert project(entity) == {
+        "id": "1",
+        "@odata.type": "#microsoft.graph.group",
+        "members.@odata.type": ["#microsoft.graph.user", "#microsoft.graph.device"]
+    }
+
+
+def test_compile_projection_property_annotation():
+    project = compile_projection(["displayName@odata.type"])
+    assert project({"displayName": "A", "displayName@odata.type": "#String"}) == {"displayName@odata.type": "#String"}
+
+
+def test_compile_projection_keeps_data_annotations():
+    project = compile_projection(["id", "displayName"])
+    entity = {
+        "@odata.type": "#microsoft.graph.group",
+        "id": "1",
+        "@removed": {"reason": "deleted"},
+        "members@delta": [{"id": "2"}]
+    }
+    assert project(entity) == {
+        "id": "1", "displayName": None, "@removed": {"reason": "deleted"}, "members@delta": [{"id": "2"}]}
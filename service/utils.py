@@ -26,6 +26,173 @@ def stream_json(entities):
     yield ']'
 
 
+# Directory navigation properties. These are not returned by $select, the caller needs to list them in $expand.
+NAVIGATION_PROPERTIES = [
+    "manager", "directReports", "memberOf", "transitiveMemberOf", "members", "transitiveMembers", "owners",
+    "ownedObjects", "registeredOwners", "registeredUsers", "createdOnBehalfOf"
+]
+
+
+def _field_parts(field):
+    """Split a dotted field path. Annotations are kept as a single literal key, i.e. '@odata.type' or
+    'displayName@odata.type'."""
+    segments = field.split(".")
+    for i, segment in enumerate(segments):
+        if "@" in segment:
+            return [part for part in segments[:i] if part] + [".".join(segments[i:])]
+    return [part for part in segments if part]
+
+
+def parse_projection(projection):
+    """Parse a projection given as a comma separated string or a list of (dotted) field paths"""
+    if not projection:
+        return []
+    if isinstance(projection, str):
+        projection = projection.split(",")
+    fields = [field.strip() for field in projection]
+    return [field for field in fields if _field_parts(field)]
+
+
+def _split_expand(expand):
+    """Split an $expand value on top level commas, leaving nested options intact"""
+    items = []
+    depth = 0
+    current = ""
+    for char in expand:
+        if char == "," and depth == 0:
+            items.append(current.strip())
+            current = ""
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        current += char
+    if current.strip():
+        items.append(current.strip())
+    return items
+
+
+def projection_query_args(fields, args):
+    """Push the projection down to graph as $select/$expand query args where possible.
+
+    Top level properties go into $select, expanded properties are returned by graph regardless of it. Dotted paths
+    below a property listed in $expand get a nested $select on that expand item, unless the whole property is
+    projected. Navigation properties are never expanded automatically, and expand items not used by the projection
+    are dropped. Annotations are never sent to graph. Existing $select or nested expand options given by the caller
+    are left untouched, the projection is then only applied locally.
+    """
+    args = args.copy()
+    if not fields:
+        return args
+
+    expand_values = args.getlist("$expand") if hasattr(args, "getlist") else [args.get("$expand", "")]
+    expand_items = [item for value in expand_values for item in _split_expand(value)]
+    # property names along each path, empty for plain annotations like '@odata.type'
+    paths = [[part.split("@")[0] for part in _field_parts(field)] for field in fields]
+    heads = [path[0] for path in paths]
+
+    unused = [item for item in expand_items if item.split("(")[0].strip() not in heads]
+    if unused:
+        logger.info(f"Dropping $expand items not used by the projection: {unused}")
+    expand_items = [item for item in expand_items if item not in unused]
+    expanded = [item.split("(")[0].strip() for item in expand_items]
+
+    select = []
+    nested_selects = {}
+    whole = set()
+    for field, path in zip(fields, paths):
+        head = path[0]
+        if not head:
+            continue
+        if head in expanded:
+            if len(path) == 1:
+                whole.add(head)
+            elif path[1] in NAVIGATION_PROPERTIES:
+                logger.warning(f"Projected field '{field}' needs a nested expand, i.e. "
+                               f"$expand={head}($expand={path[1]}). Expanding '{head}' without $select.")
+                whole.add(head)
+            elif path[1]:
+                nested = nested_selects.setdefault(head, [])
+                if path[1] not in nested:
+                    nested.append(path[1])
+            continue
+        if head in NAVIGATION_PROPERTIES:
+            logger.warning(f"Projected field '{field}' refers to navigation property '{head}' which needs to be "
+                           f"listed in $expand.")
+            continue
+        if head not in select:
+            select.append(head)
+
+    if select and "$select" not in args:
+        args["$select"] = ",".join(select)
+
+    if expand_items:
+        args["$expand"] = ",".join(
+            f"{item}($select={','.join(nested_selects[item])})"
+            if item in nested_selects and item not in whole else item
+            for item in expand_items
+        )
+    else:
+        args.pop("$expand", None)
+    return args
+
+
+def _strip_annotations(value):
+    if isinstance(value, dict):
+        return {k: _strip_annotations(v) for k, v in value.items() if "@" not in k}
+    if isinstance(value, list):
+        return [_strip_annotations(v) for v in value]
+    return value
+
+
+def _is_data_annotation(key):
+    """Annotations carrying data rather than metadata, like '@removed' on deleted objects in delta responses"""
+    return key == "@removed" or key.endswith("@delta")
+
+
+def _compile_path(parts):
+    """Build a getter for the given path parts. Lists along the path are mapped over."""
+    head = parts[0]
+    if len(parts) == 1:
+        def get_leaf(entity):
+            if not isinstance(entity, dict):
+                return None
+            return _strip_annotations(entity.get(head))
+        return get_leaf
+
+    get_rest = _compile_path(parts[1:])
+
+    def get(entity):
+        if not isinstance(entity, dict):
+            return None
+        value = entity.get(head)
+        if value is None:
+            return None
+        if isinstance(value, list):
+            return [get_rest(v) for v in value]
+        return get_rest(value)
+    return get
+
+
+def compile_projection(fields):
+    """Compile the projection into a function returning a flat entity with only the projected fields.
+
+    Nested values are flattened into dotted keys, i.e. 'manager.displayName', and annotations like '@odata.type' are
+    stripped from the returned values unless projected explicitly. Annotations carrying data, like '@removed', are kept
+    on the returned entity. Missing fields are returned as None.
+    """
+    getters = [(field, _compile_path(_field_parts(field))) for field in fields]
+
+    def project(entity):
+        projected = {field: getter(entity) for field, getter in getters}
+        for key in entity:
+            if "@" in key and _is_data_annotation(key):
+                projected[key] = entity[key]
+        return projected
+    return project
+
+
 def determine_url_parts(sharepoint_url, path):
     """Determine the different parts of the relative url"""
     file_name = False